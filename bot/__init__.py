@@ -1,5 +1,7 @@
 from .handlers import setup_handlers
 from .keyboards import get_main_keyboard, get_quest_keyboard
 from .utils import send_quest_message
+from .broadcast import setup_broadcaster
+from .intake import PriorityUpdateQueue
 
-__all__ = ['setup_handlers', 'get_main_keyboard', 'get_quest_keyboard', 'send_quest_message'] 
\ No newline at end of file
+__all__ = ['setup_handlers', 'get_main_keyboard', 'get_quest_keyboard', 'send_quest_message', 'setup_broadcaster', 'PriorityUpdateQueue'] 
\ No newline at end of file
@@ -0,0 +1,307 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+from database.models import User, Quest
+from config import (
+    ADMIN_GROUP_ID, USER_GROUP_ID, BROADCAST_DM_USERS, BROADCAST_WORKERS, BROADCAST_RATE_LIMIT,
+    BROADCAST_PAGE_SIZE, BROADCAST_STATE_FILE, BROADCAST_REPORT_INTERVAL, BROADCAST_SAVE_EVERY,
+    BROADCAST_MAX_RETRIES, BROADCAST_RETRY_DELAY
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_SEND_ATTEMPTS = 3
+
+# Errors that will fail again on retry, e.g. a bad image URL or the bot removed from the group
+PERMANENT_ERRORS = (BadRequest, Forbidden)
+
+def format_announcement(quest: Quest) -> str:
+    """Format a new quest announcement as plain text, so admin input can't break parsing"""
+    message = (
+        f"New quest available!\n\n"
+        f"Title: {quest.title}\n"
+        f"Code: {quest.quest_code}\n"
+        f"Points: {quest.points}\n"
+        f"Description: {quest.description}"
+    )
+    if quest.deadline:
+        message += f"\nDeadline: {quest.deadline.strftime('%Y-%m-%d %H:%M')}"
+    return message
+
+class RateLimiter:
+    """Spaces out sends so the bot stays under Telegram's global flood limit"""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Wait for the next free send slot"""
+        async with self._lock:
+            # Re-check after sleeping, pause() may have pushed the slot out meanwhile
+            while self._next_slot > time.monotonic():
+                await asyncio.sleep(self._next_slot - time.monotonic())
+            self._next_slot = time.monotonic() + self._interval
+
+    def pause(self, seconds: float):
+        """Hold back all senders, e.g. after Telegram answered with RetryAfter"""
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+class Broadcaster:
+    """
+    Announces new quests to the user group and optionally DMs every known user.
+
+    Jobs, the per-job cursor (last telegram_id of a finished page) and the ids
+    already done in the current page are persisted to BROADCAST_STATE_FILE every
+    BROADCAST_SAVE_EVERY deliveries and on stop, so a restart resumes where it
+    left off. Users who blocked the bot are skipped in later broadcasts until they
+    contact the bot again. Photos are sent by Telegram file_id rather than by URL,
+    so nothing token-bearing is persisted. Transient failures are retried with backoff; a job that keeps
+    failing is reported to the admin group and dropped so later quests still go out.
+    """
+
+    def __init__(self, bot, state_file: str = BROADCAST_STATE_FILE):
+        self.bot = bot
+        self.state_file = state_file
+        self.limiter = RateLimiter(BROADCAST_RATE_LIMIT)
+        self._state = self._load_state()
+        self._blocked = set(self._state['blocked'])
+        self._task: Optional[asyncio.Task] = None
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load broadcast state from {self.state_file}: {e}")
+        return {'jobs': [], 'blocked': []}
+
+    def _save_state(self):
+        self._state['blocked'] = sorted(self._blocked)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_file, self.state_file)
+
+    async def announce(self, quest: Quest, photo: Optional[str] = None):
+        """Queue a broadcast for a newly created quest, with an optional photo file_id"""
+        self._state['jobs'].append({
+            'quest_id': str(quest.id),
+            'title': quest.title,
+            'quest_code': quest.quest_code,
+            'text': format_announcement(quest),
+            'photo': photo,
+            'dm_users': BROADCAST_DM_USERS,
+            'group_sent': False,
+            'cursor': None,
+            'page_done': [],
+            'attempts': 0,
+            'sent': 0,
+            'failed': 0,
+            'report_message_id': None
+        })
+        self._save_state()
+        self.resume()
+
+    def unblock(self, telegram_id: int):
+        """Include a user in broadcasts again, e.g. after they restarted the bot"""
+        if telegram_id in self._blocked:
+            logger.info(f"User {telegram_id} contacted the bot again, re-adding to broadcasts")
+            self._blocked.discard(telegram_id)
+            self._save_state()
+
+    def resume(self):
+        """Start working through pending jobs unless already running"""
+        if self._state['jobs'] and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the running broadcast; it resumes from the saved cursor on next start"""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._state['jobs']:
+            self._save_state()
+
+    async def _run(self):
+        while self._state['jobs']:
+            job = self._state['jobs'][0]
+            try:
+                await self._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except PERMANENT_ERRORS as e:
+                await self._fail_job(job, e)
+            except Exception as e:
+                job['attempts'] += 1
+                if job['attempts'] >= BROADCAST_MAX_RETRIES:
+                    await self._fail_job(job, e)
+                else:
+                    delay = BROADCAST_RETRY_DELAY * 2 ** (job['attempts'] - 1)
+                    logger.warning(
+                        f"Broadcast for quest {job['quest_code']} failed: {e}, retrying in {delay}s"
+                    )
+                    self._save_state()
+                    await asyncio.sleep(delay)
+                    continue
+            self._state['jobs'].pop(0)
+            self._save_state()
+
+    async def _fail_job(self, job: dict, error: Exception):
+        """Give up on a job and tell the admins, so it doesn't hold up later broadcasts"""
+        logger.error(f"Broadcast for quest {job['quest_code']} failed permanently: {error}")
+        await self.limiter.wait()
+        try:
+            await self.bot.send_message(
+                chat_id=ADMIN_GROUP_ID,
+                text=f"Broadcast for quest {job['title']} ({job['quest_code']}) failed: {error}"
+            )
+        except TelegramError as e:
+            logger.warning(f"Failed to report broadcast failure: {e}")
+
+    async def _run_job(self, job: dict):
+        if not job['group_sent']:
+            logger.info(f"Announcing quest {job['quest_code']} in user group")
+            message = await self._send_with_retry(USER_GROUP_ID, job)
+            if job['photo'] and message.photo:
+                # Reuse the file Telegram now holds for the DMs
+                job['photo'] = message.photo[-1].file_id
+            job['group_sent'] = True
+            job['attempts'] = 0
+            self._save_state()
+
+        if not job['dm_users']:
+            return
+
+        started = time.monotonic()
+        remaining = await User.count(after=job['cursor'])
+        progress = {
+            'done': 0, 'remaining': remaining, 'started': started, 'last_report': started, 'unsaved': 0
+        }
+        queue = asyncio.Queue(maxsize=BROADCAST_WORKERS * 2)
+        workers = [asyncio.create_task(self._worker(queue, job, progress)) for _ in range(BROADCAST_WORKERS)]
+        try:
+            while True:
+                telegram_ids = await User.get_telegram_ids(after=job['cursor'], limit=BROADCAST_PAGE_SIZE)
+                if not telegram_ids:
+                    break
+                page_done = set(job['page_done'])
+                for telegram_id in telegram_ids:
+                    if telegram_id in self._blocked or telegram_id in page_done:
+                        progress['done'] += 1
+                        continue
+                    await queue.put(telegram_id)
+                await queue.join()
+
+                job['cursor'] = telegram_ids[-1]
+                job['page_done'] = []
+                job['attempts'] = 0
+                self._save_state()
+                if time.monotonic() - progress['last_report'] >= BROADCAST_REPORT_INTERVAL:
+                    await self._report(job, progress)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        await self._report(job, progress, finished=True)
+
+    async def _worker(self, queue: asyncio.Queue, job: dict, progress: dict):
+        while True:
+            telegram_id = await queue.get()
+            try:
+                if await self._deliver(telegram_id, job):
+                    job['sent'] += 1
+                else:
+                    job['failed'] += 1
+                progress['done'] += 1
+                job['page_done'].append(telegram_id)
+                progress['unsaved'] += 1
+                if progress['unsaved'] >= BROADCAST_SAVE_EVERY:
+                    progress['unsaved'] = 0
+                    self._save_state()
+            except Exception as e:
+                logger.error(f"Broadcast worker error for user {telegram_id}: {e}")
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, telegram_id: int, job: dict) -> bool:
+        """DM a single user, returning whether the message went through"""
+        try:
+            await self._send_with_retry(telegram_id, job)
+            return True
+        except Forbidden:
+            logger.info(f"Dropping user {telegram_id} from broadcasts: bot is blocked")
+            self._blocked.add(telegram_id)
+        except Exception as e:
+            logger.warning(f"Failed to send broadcast to {telegram_id}: {e}")
+        return False
+
+    async def _send_with_retry(self, chat_id: int, job: dict):
+        """Send within the rate limit, waiting out Telegram's flood control if it kicks in"""
+        for attempt in range(MAX_SEND_ATTEMPTS):
+            await self.limiter.wait()
+            try:
+                return await self._send(chat_id, job)
+            except RetryAfter as e:
+                logger.warning(f"Flood limit hit during broadcast, pausing {e.retry_after}s")
+                self.limiter.pause(float(e.retry_after))
+                if attempt == MAX_SEND_ATTEMPTS - 1:
+                    raise
+
+    async def _send(self, chat_id: int, job: dict):
+        if job['photo']:
+            return await self.bot.send_photo(chat_id=chat_id, photo=job['photo'], caption=job['text'])
+        return await self.bot.send_message(chat_id=chat_id, text=job['text'])
+
+    async def _report(self, job: dict, progress: dict, finished: bool = False):
+        """Post or update the progress message in the admin group"""
+        now = time.monotonic()
+        progress['last_report'] = now
+        elapsed = max(now - progress['started'], 1e-6)
+        rate = progress['done'] / elapsed
+        left = max(progress['remaining'] - progress['done'], 0)
+
+        text = (
+            f"Broadcast for quest {job['title']} ({job['quest_code']})"
+            f"{' finished' if finished else ''}\n\n"
+            f"Progress: {progress['done']}/{progress['remaining']} users\n"
+            f"Delivered: {job['sent']}\n"
+            f"Failed: {job['failed']}\n"
+            f"Throughput: {rate:.1f} msg/s"
+        )
+        if not finished:
+            eta = int(left / rate) if rate > 0 else None
+            text += f"\nETA: {f'{eta // 60}m {eta % 60}s' if eta is not None else 'unknown'}"
+
+        await self.limiter.wait()
+        try:
+            if job['report_message_id']:
+                await self.bot.edit_message_text(
+                    chat_id=ADMIN_GROUP_ID,
+                    message_id=job['report_message_id'],
+                    text=text
+                )
+            else:
+                message = await self.bot.send_message(chat_id=ADMIN_GROUP_ID, text=text)
+                job['report_message_id'] = message.message_id
+                self._save_state()
+        except TelegramError as e:
+            logger.warning(f"Failed to report broadcast progress: {e}")
+
+def setup_broadcaster(application) -> Broadcaster:
+    """Attach a Broadcaster to the application so handlers can reach it via bot_data"""
+    broadcaster = Broadcaster(application.bot)
+    application.bot_data['broadcaster'] = broadcaster
+    return broadcaster
@@ -6,6 +6,7 @@ from database.supabase import get_client
 from .keyboards import get_main_keyboard, get_approval_keyboard, get_quest_list_keyboard
 from config import ADMIN_GROUP_ID, USER_GROUP_ID
 from .utils import send_quest_message, format_quest_message, format_submission_message, extract_quest_code
+from .throttle import submission_limiter, THROTTLED_REPLY
 from datetime import datetime
 import uuid
 
@@ -21,6 +22,11 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         last_name=update.effective_user.last_name
     )
     
+    # A user who blocked the bot and came back should get broadcasts again
+    broadcaster = context.bot_data.get('broadcaster')
+    if broadcaster:
+        broadcaster.unblock(update.effective_user.id)
+    
     is_admin = update.effective_chat.id == ADMIN_GROUP_ID
     await update.message.reply_text(
         "Welcome to the Quest Bot! Choose an option:",
@@ -97,6 +103,7 @@ async def handle_admin_message(update: Update, context: ContextTypes.DEFAULT_TYP
                 file = await context.bot.get_file(photo.file_id)
                 image_url = file.file_path
                 context.user_data['pending_quest']['image_url'] = image_url
+                context.user_data['pending_quest']['image_file_id'] = photo.file_id
             
             # Send confirmation message
             message = f"Create new quest?\n\nTitle: {title}\nDescription: {description}\nCode: {quest_code}\nPoints: {points}"
@@ -134,6 +141,13 @@ async def handle_user_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     # Check if message contains a quest code
     quest_code = await extract_quest_code(message_text)
     if quest_code:
+        user_id = update.effective_user.id
+        if not submission_limiter.hit(user_id):
+            logger.info(f"Throttling submissions from user {user_id}")
+            if submission_limiter.should_warn(user_id):
+                await update.message.reply_text(THROTTLED_REPLY)
+            return
+        
         quest = await Quest.get_by_code(quest_code)
         
         if quest:
@@ -217,6 +231,11 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     reply_markup=get_main_keyboard(is_admin=True)
                 )
             context.user_data.pop('pending_quest', None)
+            
+            # Announce the new quest to users in the background
+            broadcaster = context.bot_data.get('broadcaster')
+            if broadcaster:
+                await broadcaster.announce(quest, photo=pending_quest.get('image_file_id'))
         else:
             await query.message.edit_text(
                 "No pending quest found. Please try creating a quest again.",
@@ -0,0 +1,174 @@
+import asyncio
+import collections
+import logging
+import time
+
+from telegram import Update, Message
+from telegram.error import TelegramError
+from config import (
+    ADMIN_GROUP_ID, USER_GROUP_ID, INTAKE_QUEUE_SIZE, INTAKE_ADMIN_OVERFLOW, INTAKE_MAX_PENDING_REPLIES,
+    INTAKE_REPORT_INTERVAL, SUBMISSION_RATE_WINDOW
+)
+from .utils import QUEST_CODE_PATTERN
+from .throttle import SlidingWindowLimiter, submission_limiter, THROTTLED_REPLY
+
+logger = logging.getLogger(__name__)
+
+# Priority levels, highest first
+PRIORITY_ADMIN = 0
+PRIORITY_SUBMISSION = 1
+PRIORITY_OTHER = 2
+PRIORITY_NAMES = ('admin', 'submission', 'other')
+
+REJECTED_REPLY = "The bot is busy right now and couldn't take your submission. Please send it again in a minute."
+
+class PriorityUpdateQueue(asyncio.Queue):
+    """
+    Bounded update queue that hands out admin group updates first, then
+    submissions, then everything else.
+
+    Used as the application's update_queue, so the poller feeds it and the
+    handlers drain it. User group messages that cannot contain a quest code, and
+    codes from users already over the submission limit, are dropped on arrival.
+
+    The bound is enforced by shedding, never by blocking the poller, so the
+    standard maxsize/full() stay unbounded. Once `limit` updates are queued, a
+    new admin update or submission evicts the oldest low-priority update. With
+    none left to evict, submissions are rejected and the user is asked to resend,
+    while admin updates may use up to `admin_overflow` extra slots. Each user
+    gets at most one reply per window about dropped submissions, and at most
+    INTAKE_MAX_PENDING_REPLIES replies are in flight at once.
+    """
+
+    def __init__(self, limit: int = INTAKE_QUEUE_SIZE, admin_overflow: int = INTAKE_ADMIN_OVERFLOW):
+        super().__init__()
+        self.limit = limit
+        self.admin_overflow = admin_overflow
+        self.filtered = 0
+        self.shed = 0
+        self.shed_submissions = 0
+        self.shed_admin = 0
+        self.throttled = 0
+        self._last_report = time.monotonic()
+        self._replies = set()
+        self._rejection_replies = SlidingWindowLimiter(1, SUBMISSION_RATE_WINDOW)
+
+    def _init(self, maxsize):
+        self._levels = tuple(collections.deque() for _ in PRIORITY_NAMES)
+        # Non-update items such as the application's stop signal, served last
+        self._control = collections.deque()
+        self._queue = None
+
+    def _get(self):
+        for level in self._levels:
+            if level:
+                return level.popleft()[1]
+        return self._control.popleft()
+
+    def _put(self, item):
+        priority, update = item
+        if priority is None:
+            self._control.append(update)
+        else:
+            self._levels[priority].append(item)
+
+    def qsize(self):
+        return sum(len(level) for level in self._levels) + len(self._control)
+
+    def empty(self):
+        return not any(self._levels) and not self._control
+
+    def depths(self) -> dict:
+        """Number of queued updates per priority level"""
+        return {name: len(level) for name, level in zip(PRIORITY_NAMES, self._levels)}
+
+    async def put(self, item):
+        self.put_nowait(item)
+
+    def put_nowait(self, item):
+        self._maybe_report()
+        if not isinstance(item, Update):
+            super().put_nowait((None, item))
+            return
+
+        priority = classify_update(item)
+        if priority is None:
+            self.filtered += 1
+            return
+
+        user = item.effective_user
+        if priority == PRIORITY_SUBMISSION and user is not None and submission_limiter.is_limited(user.id):
+            # The handler would reject it anyway; don't let a spammer take queue slots
+            self.throttled += 1
+            if submission_limiter.should_warn(user.id):
+                self._reply(item.message, THROTTLED_REPLY)
+            return
+
+        if self.limit > 0 and self.qsize() >= self.limit and not self._shed_other(priority):
+            if priority == PRIORITY_OTHER:
+                self.shed += 1
+                return
+            if priority == PRIORITY_SUBMISSION:
+                self.shed_submissions += 1
+                logger.warning(f"Update queue full, rejecting submission from user {user.id if user else None}")
+                if user is not None and self._rejection_replies.hit(user.id):
+                    self._reply(item.message, REJECTED_REPLY)
+                return
+            if self.qsize() >= self.limit + self.admin_overflow:
+                self.shed_admin += 1
+                logger.error(f"Update queue full even for admin updates, dropping update {item.update_id}")
+                return
+        super().put_nowait((priority, item))
+
+    def _shed_other(self, priority: int) -> bool:
+        """Drop the oldest low-priority update to make room, if there is one"""
+        other = self._levels[PRIORITY_OTHER]
+        if priority == PRIORITY_OTHER or not other:
+            return False
+        other.popleft()
+        self.task_done()
+        self.shed += 1
+        return True
+
+    def _reply(self, message: Message, text: str):
+        """Tell a user their submission was dropped, without blocking the poller"""
+        if len(self._replies) >= INTAKE_MAX_PENDING_REPLIES:
+            logger.debug(f"Too many pending intake replies, not replying to message {message.message_id}")
+            return
+        task = asyncio.get_running_loop().create_task(self._send_reply(message, text))
+        self._replies.add(task)
+        task.add_done_callback(self._replies.discard)
+
+    async def _send_reply(self, message: Message, text: str):
+        try:
+            await message.reply_text(text)
+        except TelegramError as e:
+            logger.warning(f"Failed to tell user about dropped submission: {e}")
+
+    def _maybe_report(self):
+        now = time.monotonic()
+        if now - self._last_report < INTAKE_REPORT_INTERVAL:
+            return
+        self._last_report = now
+        logger.info(
+            f"Update queue depth {self.qsize()}/{self.limit} {self.depths()}, "
+            f"filtered {self.filtered}, throttled {self.throttled}, shed {self.shed}, "
+            f"rejected submissions {self.shed_submissions}, dropped admin {self.shed_admin}"
+        )
+
+def classify_update(update: Update):
+    """Return the priority of an update, or None if it should be dropped outright"""
+    chat = update.effective_chat
+    if chat is not None and chat.id == ADMIN_GROUP_ID:
+        return PRIORITY_ADMIN
+
+    message = update.message
+    if message is not None and chat is not None and chat.id == USER_GROUP_ID:
+        text = message.text
+        if text and text.startswith('/'):
+            return PRIORITY_OTHER
+        if text and QUEST_CODE_PATTERN.search(text):
+            return PRIORITY_SUBMISSION
+        return None
+
+    return PRIORITY_OTHER
@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+from config import SUBMISSION_RATE_LIMIT, SUBMISSION_RATE_WINDOW
+
+THROTTLED_REPLY = "You're sending submissions too quickly. Please wait a bit and try again."
+
+class _Window:
+    """Counters for one key: hits in the current and the previous fixed window"""
+    __slots__ = ('index', 'current', 'previous', 'warned')
+
+    def __init__(self, index: int):
+        self.index = index
+        self.current = 0
+        self.previous = 0
+        self.warned = False
+
+class SlidingWindowLimiter:
+    """
+    In-memory sliding-window rate limiter.
+
+    Uses the sliding window counter approximation: the previous window's count is
+    weighted by how much of it still overlaps the sliding window, so each key
+    needs two counters instead of a log of timestamps. Keys idle for a full window
+    carry no state worth keeping and are evicted on later calls.
+    """
+
+    def __init__(self, limit: int, window: float, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        # Ordered from least to most recently hit, so idle keys sit at the front
+        self._windows: 'OrderedDict[Hashable, _Window]' = OrderedDict()
+
+    def __len__(self):
+        return len(self._windows)
+
+    def hit(self, key: Hashable) -> bool:
+        """Record a hit for key, returning False if it is over the limit"""
+        now = self._clock()
+        index = int(now // self.window)
+        self._evict_idle(index)
+
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window(index)
+        else:
+            self._windows.move_to_end(key)
+            self._roll(window, index)
+
+        if self._estimate(window.previous, window.current, now, index) >= self.limit:
+            return False
+        window.current += 1
+        return True
+
+    def is_limited(self, key: Hashable) -> bool:
+        """Return True if the next hit for key would be rejected, without recording one"""
+        window = self._windows.get(key)
+        if window is None:
+            return False
+        now = self._clock()
+        index = int(now // self.window)
+        previous, current = window.previous, window.current
+        if window.index != index:
+            previous = current if window.index == index - 1 else 0
+            current = 0
+        return self._estimate(previous, current, now, index) >= self.limit
+
+    def _estimate(self, previous: int, current: int, now: float, index: int) -> float:
+        overlap = 1 - (now - index * self.window) / self.window
+        return previous * overlap + current
+
+    def should_warn(self, key: Hashable) -> bool:
+        """Return True the first time a throttled key asks within a window"""
+        window = self._windows.get(key)
+        if window is None:
+            return False
+        self._roll(window, int(self._clock() // self.window))
+        if window.warned:
+            return False
+        window.warned = True
+        return True
+
+    def _roll(self, window: _Window, index: int):
+        """Move a key's counters forward to the window with the given index"""
+        if window.index != index:
+            window.previous = window.current if window.index == index - 1 else 0
+            window.current = 0
+            window.index = index
+            window.warned = False
+
+    def _evict_idle(self, index: int):
+        while self._windows:
+            key, window = next(iter(self._windows.items()))
+            if window.index >= index - 1:
+                break
+            del self._windows[key]
+
+# Caps quest submissions per Telegram user, shared by the intake queue and the handlers
+submission_limiter = SlidingWindowLimiter(SUBMISSION_RATE_LIMIT, SUBMISSION_RATE_WINDOW)
@@ -5,6 +5,9 @@ from config import QUEST_ID_PREFIX
 import re
 from typing import Optional
 
+# Quest codes look like QUEST123 or #QUEST123
+QUEST_CODE_PATTERN = re.compile(r'(?:#)?([A-Z0-9]{3,})')
+
 async def send_quest_message(update: Update, quest: Quest):
     """Send a quest message with proper formatting"""
     message = await format_quest_message(quest)
@@ -49,6 +52,5 @@ async def format_submission_message(submission: Submission) -> str:
 
 async def extract_quest_code(text: str) -> Optional[str]:
     """Extract quest code from text"""
-    # Look for code in format: QUEST123 or #QUEST123
-    match = re.search(r'(?:#)?([A-Z0-9]{3,})', text)
+    match = QUEST_CODE_PATTERN.search(text)
     return match.group(1) if match else None 
\ No newline at end of file
@@ -20,4 +20,25 @@ DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 
 # Quest configuration
 QUEST_ID_PREFIX = "Q"
-SUBMISSION_ID_PREFIX = "S" 
\ No newline at end of file
+SUBMISSION_ID_PREFIX = "S" 
+
+# Broadcast configuration
+BROADCAST_DM_USERS = os.getenv('BROADCAST_DM_USERS', 'False').lower() == 'true'
+BROADCAST_WORKERS = int(os.getenv('BROADCAST_WORKERS', '8'))
+BROADCAST_RATE_LIMIT = float(os.getenv('BROADCAST_RATE_LIMIT', '25'))  # messages per second
+BROADCAST_PAGE_SIZE = 500
+BROADCAST_STATE_FILE = os.getenv('BROADCAST_STATE_FILE', 'broadcast_state.json')
+BROADCAST_REPORT_INTERVAL = 30  # seconds between progress reports
+BROADCAST_SAVE_EVERY = 25  # deliveries between state saves; at most this many DMs repeat after a crash
+BROADCAST_MAX_RETRIES = 5  # attempts before a failing broadcast is dropped
+BROADCAST_RETRY_DELAY = 10  # seconds, doubled after every failed attempt
+
+# Update intake configuration
+INTAKE_QUEUE_SIZE = int(os.getenv('INTAKE_QUEUE_SIZE', '1000'))  # hard cap, except for admin updates
+INTAKE_ADMIN_OVERFLOW = 100  # extra slots admin updates may use past INTAKE_QUEUE_SIZE
+INTAKE_MAX_PENDING_REPLIES = 20  # replies about dropped submissions in flight at once
+INTAKE_REPORT_INTERVAL = 60  # seconds between queue depth reports
+
+# Submission throttling, per Telegram user
+SUBMISSION_RATE_LIMIT = int(os.getenv('SUBMISSION_RATE_LIMIT', '5'))  # submissions per window
+SUBMISSION_RATE_WINDOW = float(os.getenv('SUBMISSION_RATE_WINDOW', '60'))  # seconds
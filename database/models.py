@@ -46,6 +46,26 @@ class User:
         result = client.table('users').insert(user_data).execute()
         return cls(**result.data[0])
 
+    @classmethod
+    async def get_telegram_ids(cls, after: Optional[int] = None, limit: int = 100) -> List[int]:
+        """Get a page of telegram_ids in ascending order, starting after the given id"""
+        client = get_client()
+        query = client.table('users').select('telegram_id')
+        if after is not None:
+            query = query.gt('telegram_id', after)
+        result = query.order('telegram_id').limit(limit).execute()
+        return [row['telegram_id'] for row in result.data]
+
+    @classmethod
+    async def count(cls, after: Optional[int] = None) -> int:
+        """Count users, optionally only those with a telegram_id after the given id"""
+        client = get_client()
+        query = client.table('users').select('telegram_id', count='exact')
+        if after is not None:
+            query = query.gt('telegram_id', after)
+        result = query.limit(1).execute()
+        return result.count or 0
+
 @dataclass
 class Quest:
     id: uuid.UUID
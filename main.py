@@ -5,6 +5,8 @@ from telegram.ext import Application
 
 from config import BOT_TOKEN, DEBUG
 from bot.handlers import setup_handlers
+from bot.broadcast import setup_broadcaster
+from bot.intake import PriorityUpdateQueue
 from bot.middlewares import setup_logging
 from database.supabase import test_connection
 
@@ -15,17 +17,24 @@ logger = logging.getLogger(__name__)
 async def main():
     """Start the bot"""
     application = None
+    broadcaster = None
     try:
         # Test Supabase connection
         if not await test_connection():
             logger.error("Failed to connect to Supabase. Exiting...")
             return
         
-        # Create the Application
-        application = Application.builder().token(BOT_TOKEN).build()
+        # Create the Application, ranking admin updates ahead of user group chatter
+        application = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            .update_queue(PriorityUpdateQueue())
+            .build()
+        )
         
         # Setup handlers
         setup_handlers(application)
+        broadcaster = setup_broadcaster(application)
         
         # Start the bot
         logger.info("Starting bot...")
@@ -33,6 +42,9 @@ async def main():
         await application.start()
         await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
         
+        # Resume any broadcast interrupted by a previous shutdown
+        broadcaster.resume()
+        
         # Keep the bot running until interrupted
         while True:
             await asyncio.sleep(1)
@@ -42,6 +54,8 @@ async def main():
     except Exception as e:
         logger.error(f"Bot stopped due to error: {e}")
     finally:
+        if broadcaster:
+            await broadcaster.stop()
         if application and application.updater:
             try:
                 await application.updater.stop()
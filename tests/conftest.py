@@ -0,0 +1,7 @@
+import os
+
+# config.py reads these at import time; give test runs without a .env harmless values
+os.environ.setdefault('ADMIN_GROUP_ID', '-1001')
+os.environ.setdefault('USER_GROUP_ID', '-1002')
+os.environ.setdefault('SUPABASE_URL', 'https://example.supabase.co')
+os.environ.setdefault('SUPABASE_KEY', 'test.supabase.key')
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import BadRequest, Forbidden, NetworkError
+
+import bot.broadcast as broadcast
+from bot.broadcast import Broadcaster, RateLimiter
+from config import ADMIN_GROUP_ID, USER_GROUP_ID
+from database.models import User, Quest
+
+USER_IDS = list(range(1, 1201))
+BLOCKED_ID = 7
+
+class FakeBot:
+    """Records sends; hangs DMs after `hang_after` deliveries and raises queued errors per chat"""
+
+    def __init__(self, hang_after: int = None, blocked: set = frozenset()):
+        self.hang_after = hang_after
+        self.blocked = blocked
+        self.errors = {}
+        self.attempted = []
+        self.sent = []
+
+    async def _send(self, chat_id: int, text: str, photo: str = None):
+        self.attempted.append(chat_id)
+        if self.errors.get(chat_id):
+            raise self.errors[chat_id].pop(0)
+        if chat_id in self.blocked:
+            raise Forbidden('Forbidden: bot was blocked by the user')
+        dms = sum(1 for sent_id, *_ in self.sent if sent_id > 0)
+        if chat_id > 0 and self.hang_after is not None and dms >= self.hang_after:
+            await asyncio.Event().wait()
+        self.sent.append((chat_id, text, photo))
+        file_ids = [SimpleNamespace(file_id='thumb'), SimpleNamespace(file_id=f'group-{photo}')]
+        return SimpleNamespace(message_id=len(self.sent), photo=file_ids if photo else ())
+
+    async def send_message(self, chat_id, text):
+        return await self._send(chat_id, text)
+
+    async def send_photo(self, chat_id, photo, caption):
+        return await self._send(chat_id, caption, photo)
+
+    async def edit_message_text(self, chat_id, message_id, text):
+        pass
+
+    def dms(self) -> list:
+        return [chat_id for chat_id, *_ in self.sent if chat_id > 0]
+
+def make_quest(title: str = 'Find the flag', quest_code: str = 'FLAG1', image_url: str = None) -> Quest:
+    return Quest(
+        id=uuid.uuid4(), quest_code=quest_code, title=title, description='Look around',
+        created_by=1, created_at=None, updated_at=None, image_url=image_url
+    )
+
+@pytest.fixture(autouse=True)
+def fast_broadcasts(monkeypatch, tmp_path):
+    async def get_telegram_ids(after=None, limit=100):
+        return [i for i in USER_IDS if after is None or i > after][:limit]
+
+    async def count(after=None):
+        return len([i for i in USER_IDS if after is None or i > after])
+
+    monkeypatch.setattr(User, 'get_telegram_ids', staticmethod(get_telegram_ids))
+    monkeypatch.setattr(User, 'count', staticmethod(count))
+    monkeypatch.setattr(broadcast, 'BROADCAST_RATE_LIMIT', 100_000)
+    monkeypatch.setattr(broadcast, 'BROADCAST_RETRY_DELAY', 0.01)
+    monkeypatch.setattr(broadcast, 'BROADCAST_DM_USERS', True)
+    monkeypatch.setattr(broadcast, 'BROADCAST_STATE_FILE', str(tmp_path / 'broadcast_state.json'))
+
+def make_broadcaster(bot: FakeBot, tmp_path) -> Broadcaster:
+    return Broadcaster(bot, state_file=str(tmp_path / 'broadcast_state.json'))
+
+async def wait_until(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        await asyncio.sleep(0.01)
+
+async def finish(broadcaster: Broadcaster):
+    await wait_until(lambda: broadcaster._task is not None and broadcaster._task.done())
+
+def test_restart_resumes_without_resending(tmp_path):
+    async def run():
+        first_bot = FakeBot(hang_after=700, blocked={BLOCKED_ID})
+        first = make_broadcaster(first_bot, tmp_path)
+        await first.announce(make_quest())
+        await wait_until(lambda: len(first_bot.dms()) >= 700)
+        await first.stop()
+        state = json.loads((tmp_path / 'broadcast_state.json').read_text())
+
+        second_bot = FakeBot(blocked={BLOCKED_ID})
+        second = make_broadcaster(second_bot, tmp_path)
+        second.resume()
+        await finish(second)
+        return first_bot, second_bot, state, second._state
+
+    first_bot, second_bot, state, final_state = asyncio.run(run())
+    job = state['jobs'][0]
+    assert job['cursor'] == 500
+    # 499 DMs went out in the first page (one user blocked), the rest in the second
+    assert len(job['page_done']) == 700 - 499
+    assert state['blocked'] == [BLOCKED_ID]
+
+    first, second = set(first_bot.dms()), set(second_bot.dms())
+    assert not first & second
+    assert first | second == set(USER_IDS) - {BLOCKED_ID}
+    assert BLOCKED_ID not in second_bot.attempted
+    assert [chat_id for chat_id, *_ in second_bot.sent].count(USER_GROUP_ID) == 0
+    assert final_state['jobs'] == []
+
+def test_unblocked_user_gets_later_broadcasts(tmp_path):
+    async def run():
+        bot = FakeBot(blocked={BLOCKED_ID})
+        broadcaster = make_broadcaster(bot, tmp_path)
+        await broadcaster.announce(make_quest())
+        await finish(broadcaster)
+
+        bot.blocked = set()
+        broadcaster.unblock(BLOCKED_ID)
+        bot.sent.clear()
+        await broadcaster.announce(make_quest(quest_code='FLAG2'))
+        await finish(broadcaster)
+        return bot, json.loads((tmp_path / 'broadcast_state.json').read_text())
+
+    bot, state = asyncio.run(run())
+    assert BLOCKED_ID in bot.dms()
+    assert state['blocked'] == []
+
+def test_transient_group_errors_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(broadcast, 'BROADCAST_DM_USERS', False)
+
+    async def run():
+        bot = FakeBot()
+        bot.errors[USER_GROUP_ID] = [NetworkError('timed out'), NetworkError('timed out')]
+        broadcaster = make_broadcaster(bot, tmp_path)
+        await broadcaster.announce(make_quest())
+        await finish(broadcaster)
+        return bot, broadcaster._state
+
+    bot, state = asyncio.run(run())
+    assert bot.attempted.count(USER_GROUP_ID) == 3
+    assert [chat_id for chat_id, *_ in bot.sent] == [USER_GROUP_ID]
+    assert state['jobs'] == []
+
+def test_permanent_failure_is_reported_and_does_not_block_later_quests(tmp_path, monkeypatch):
+    monkeypatch.setattr(broadcast, 'BROADCAST_DM_USERS', False)
+
+    async def run():
+        bot = FakeBot()
+        bot.errors[USER_GROUP_ID] = [BadRequest("Can't parse entities")]
+        broadcaster = make_broadcaster(bot, tmp_path)
+        await broadcaster.announce(make_quest(quest_code='BROKEN'))
+        await broadcaster.announce(make_quest(quest_code='FLAG2'))
+        await finish(broadcaster)
+        return bot, broadcaster._state
+
+    bot, state = asyncio.run(run())
+    admin_texts = [text for chat_id, text, _ in bot.sent if chat_id == ADMIN_GROUP_ID]
+    group_texts = [text for chat_id, text, _ in bot.sent if chat_id == USER_GROUP_ID]
+    assert len(admin_texts) == 1 and 'BROKEN' in admin_texts[0] and 'failed' in admin_texts[0]
+    assert len(group_texts) == 1 and 'FLAG2' in group_texts[0]
+    assert state['jobs'] == []
+
+def test_dms_reuse_group_photo_file_id(tmp_path):
+    url = 'https://api.telegram.org/file/botSECRET-TOKEN/photos/file_1.jpg'
+
+    async def run():
+        bot = FakeBot(hang_after=10)
+        broadcaster = make_broadcaster(bot, tmp_path)
+        await broadcaster.announce(make_quest(image_url=url), photo='admin-file')
+        await wait_until(lambda: len(bot.dms()) >= 10)
+        await broadcaster.stop()
+        return bot
+
+    bot = asyncio.run(run())
+    assert bot.sent[0][0] == USER_GROUP_ID and bot.sent[0][2] == 'admin-file'
+    assert {photo for chat_id, _, photo in bot.sent if chat_id > 0} == {'group-admin-file'}
+    assert 'SECRET-TOKEN' not in (tmp_path / 'broadcast_state.json').read_text()
+
+def test_rate_limiter_pause_holds_back_sleeping_waiter():
+    async def run():
+        limiter = RateLimiter(rate=10)
+        await limiter.wait()
+        waiter = asyncio.create_task(limiter.wait())
+        await asyncio.sleep(0.01)
+        # The waiter is already sleeping towards its slot when flood control kicks in
+        paused_at = time.monotonic()
+        limiter.pause(0.3)
+        await waiter
+        return time.monotonic() - paused_at
+
+    assert asyncio.run(run()) >= 0.3
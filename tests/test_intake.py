@@ -0,0 +1,209 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from telegram import Update, Message, Chat, User, CallbackQuery
+
+import bot.intake as intake
+from config import ADMIN_GROUP_ID, USER_GROUP_ID
+from bot.intake import (
+    PriorityUpdateQueue, classify_update, PRIORITY_ADMIN, PRIORITY_SUBMISSION, PRIORITY_OTHER, REJECTED_REPLY
+)
+from bot.throttle import SlidingWindowLimiter, THROTTLED_REPLY
+
+PRIVATE_CHAT_ID = 42
+STOP_SIGNAL = object()
+
+def make_message_update(update_id: int, chat_id: int, text: str, user_id: int = PRIVATE_CHAT_ID) -> Update:
+    chat = Chat(chat_id, Chat.PRIVATE if chat_id > 0 else Chat.SUPERGROUP)
+    message = Message(update_id, datetime.now(timezone.utc), chat, from_user=User(user_id, 'Tester', False), text=text)
+    return Update(update_id, message=message)
+
+def make_callback_update(update_id: int, chat_id: int, data: str) -> Update:
+    message = Message(update_id, datetime.now(timezone.utc), Chat(chat_id, Chat.SUPERGROUP), text='Review')
+    query = CallbackQuery(str(update_id), User(PRIVATE_CHAT_ID, 'Admin', False), 'instance', message=message, data=data)
+    return Update(update_id, callback_query=query)
+
+@pytest.fixture(autouse=True)
+def fresh_submission_limiter(monkeypatch):
+    limiter = SlidingWindowLimiter(limit=2, window=60)
+    monkeypatch.setattr(intake, 'submission_limiter', limiter)
+    return limiter
+
+class RecordingQueue(PriorityUpdateQueue):
+    """Records replies about dropped submissions instead of sending them through the Bot API"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replies = []
+
+    def _reply(self, message, text):
+        self.replies.append((message.text, text))
+
+def drain(queue: PriorityUpdateQueue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+        queue.task_done()
+    return items
+
+def texts(items: list) -> list:
+    return [item.effective_message.text if isinstance(item, Update) else item for item in items]
+
+def test_classify_update():
+    assert classify_update(make_callback_update(1, ADMIN_GROUP_ID, 'approve_x')) == PRIORITY_ADMIN
+    assert classify_update(make_message_update(2, ADMIN_GROUP_ID, 'Title\nDesc\nCODE')) == PRIORITY_ADMIN
+    assert classify_update(make_message_update(3, USER_GROUP_ID, 'done #QUEST1')) == PRIORITY_SUBMISSION
+    assert classify_update(make_message_update(4, USER_GROUP_ID, '/start')) == PRIORITY_OTHER
+    assert classify_update(make_message_update(5, PRIVATE_CHAT_ID, 'hello')) == PRIORITY_OTHER
+    assert classify_update(make_message_update(6, USER_GROUP_ID, 'just chatting')) is None
+
+def test_serves_by_priority_then_fifo():
+    async def run():
+        queue = PriorityUpdateQueue(limit=10)
+        await queue.put(make_message_update(1, PRIVATE_CHAT_ID, 'other'))
+        await queue.put(make_message_update(2, USER_GROUP_ID, 'QUEST1'))
+        await queue.put(make_callback_update(3, ADMIN_GROUP_ID, 'admin1'))
+        await queue.put(STOP_SIGNAL)
+        await queue.put(make_message_update(4, USER_GROUP_ID, 'QUEST2'))
+        await queue.put(make_callback_update(5, ADMIN_GROUP_ID, 'admin2'))
+        await queue.put(make_message_update(6, USER_GROUP_ID, 'chatter'))
+        return drain(queue), queue.filtered
+
+    items, filtered = asyncio.run(run())
+    assert texts(items) == ['Review', 'Review', 'QUEST1', 'QUEST2', 'other', STOP_SIGNAL]
+    assert [item.update_id for item in items[:2]] == [3, 5]
+    assert filtered == 1
+
+def test_full_queue_sheds_only_other_updates():
+    async def run():
+        queue = RecordingQueue(limit=3, admin_overflow=1)
+        await queue.put(make_message_update(1, PRIVATE_CHAT_ID, 'other1'))
+        await queue.put(make_message_update(2, USER_GROUP_ID, 'QUEST1'))
+        await queue.put(make_message_update(3, PRIVATE_CHAT_ID, 'other2'))
+        # Full: the submission evicts the oldest other update, the new other update is shed
+        await queue.put(make_message_update(4, USER_GROUP_ID, 'QUEST2'))
+        await queue.put(make_message_update(5, PRIVATE_CHAT_ID, 'other3'))
+        # Admin updates evict the last other update, then overflow, never touching submissions
+        await queue.put(make_callback_update(6, ADMIN_GROUP_ID, 'admin1'))
+        await queue.put(make_callback_update(7, ADMIN_GROUP_ID, 'admin2'))
+        # No other updates left: submissions are rejected, admin overflow is capped
+        await queue.put(make_message_update(8, USER_GROUP_ID, 'QUEST3'))
+        await queue.put(make_callback_update(9, ADMIN_GROUP_ID, 'admin3'))
+        counts = (queue.shed, queue.shed_submissions, queue.shed_admin, queue.replies)
+        return drain(queue), counts
+
+    items, (shed, shed_submissions, shed_admin, replies) = asyncio.run(run())
+    assert [item.update_id for item in items] == [6, 7, 2, 4]
+    assert shed == 3
+    assert shed_submissions == 1
+    assert replies == [('QUEST3', REJECTED_REPLY)]
+    assert shed_admin == 1
+
+def test_throttled_users_dropped_on_arrival_with_one_warning(fresh_submission_limiter):
+    async def run():
+        queue = RecordingQueue(limit=10)
+        # The spammer already used up their limit in the handler
+        fresh_submission_limiter.hit(1)
+        fresh_submission_limiter.hit(1)
+        for update_id in range(1, 4):
+            await queue.put(make_message_update(update_id, USER_GROUP_ID, f'QUEST{update_id}', user_id=1))
+        await queue.put(make_message_update(4, USER_GROUP_ID, 'QUEST4', user_id=2))
+        return drain(queue), queue.throttled, queue.replies
+
+    items, throttled, replies = asyncio.run(run())
+    assert [item.update_id for item in items] == [4]
+    assert throttled == 3
+    assert replies == [('QUEST1', THROTTLED_REPLY)]
+
+def test_rejection_replies_once_per_user():
+    async def run():
+        queue = RecordingQueue(limit=1, admin_overflow=0)
+        await queue.put(make_message_update(1, USER_GROUP_ID, 'QUEST1', user_id=5))
+        await queue.put(make_message_update(2, USER_GROUP_ID, 'QUEST2', user_id=1))
+        await queue.put(make_message_update(3, USER_GROUP_ID, 'QUEST3', user_id=1))
+        await queue.put(make_message_update(4, USER_GROUP_ID, 'QUEST4', user_id=2))
+        return queue.shed_submissions, queue.replies
+
+    shed_submissions, replies = asyncio.run(run())
+    assert shed_submissions == 3
+    assert replies == [('QUEST2', REJECTED_REPLY), ('QUEST4', REJECTED_REPLY)]
+
+def test_pending_replies_are_capped(monkeypatch):
+    monkeypatch.setattr(intake, 'INTAKE_MAX_PENDING_REPLIES', 2)
+
+    async def hang(text):
+        await asyncio.Event().wait()
+
+    async def run():
+        queue = PriorityUpdateQueue()
+        message = SimpleNamespace(message_id=1, reply_text=hang)
+        for _ in range(5):
+            queue._reply(message, REJECTED_REPLY)
+        pending = len(queue._replies)
+        for task in list(queue._replies):
+            task.cancel()
+        await asyncio.gather(*queue._replies, return_exceptions=True)
+        return pending
+
+    assert asyncio.run(run()) == 2
+
+def test_join_completes_after_filtering_and_shedding():
+    async def run():
+        queue = RecordingQueue(limit=2, admin_overflow=0)
+        for update_id in range(1, 6):
+            await queue.put(make_message_update(update_id, PRIVATE_CHAT_ID, 'other'))
+            await queue.put(make_message_update(update_id + 10, USER_GROUP_ID, 'chatter'))
+        await queue.put(make_message_update(20, USER_GROUP_ID, 'QUEST1'))
+        await queue.put(make_callback_update(21, ADMIN_GROUP_ID, 'admin'))
+        await queue.put(make_callback_update(22, ADMIN_GROUP_ID, 'admin'))
+        await queue.put(STOP_SIGNAL)
+        items = drain(queue)
+        await asyncio.wait_for(queue.join(), timeout=1)
+        return items
+
+    items = asyncio.run(run())
+    assert items[-1] is STOP_SIGNAL
+    assert [item.update_id for item in items[:-1]] == [21, 20]
+
+def test_admin_latency_stays_flat_under_flood():
+    handler_time = 0.001
+
+    async def measure(flood_size: int) -> float:
+        queue = PriorityUpdateQueue(limit=1000)
+        enqueued = {}
+        latencies = []
+
+        async def handle():
+            # Mirrors the application's fetcher: one update at a time
+            while True:
+                update = await queue.get()
+                if update is STOP_SIGNAL:
+                    queue.task_done()
+                    return
+                if update.update_id in enqueued:
+                    latencies.append(time.perf_counter() - enqueued[update.update_id])
+                await asyncio.sleep(handler_time)
+                queue.task_done()
+
+        handler = asyncio.create_task(handle())
+        for update_id in range(flood_size):
+            chat_id = USER_GROUP_ID if update_id % 2 else PRIVATE_CHAT_ID
+            text = f'QUEST{update_id}' if update_id % 4 == 1 else f'chatter {update_id}'
+            await queue.put(make_message_update(update_id, chat_id, text, user_id=update_id))
+        for update_id in range(10**6, 10**6 + 100):
+            enqueued[update_id] = time.perf_counter()
+            await queue.put(make_callback_update(update_id, ADMIN_GROUP_ID, 'approve_x'))
+            await asyncio.sleep(handler_time * 3)
+        await queue.put(STOP_SIGNAL)
+        await handler
+
+        latencies.sort()
+        return latencies[int(len(latencies) * 0.99) - 1]
+
+    idle_p99 = asyncio.run(measure(0))
+    flood_p99 = asyncio.run(measure(5000))
+    # An admin update waits for at most the handler already running, flood or not
+    assert flood_p99 < idle_p99 + handler_time * 5
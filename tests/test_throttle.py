@@ -0,0 +1,115 @@
+from bot.throttle import SlidingWindowLimiter
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def make_limiter(limit: int = 5, window: float = 60.0):
+    clock = FakeClock()
+    return SlidingWindowLimiter(limit, window, clock=clock), clock
+
+def test_allows_exactly_limit_within_window():
+    limiter, clock = make_limiter()
+    assert [limiter.hit(1) for _ in range(6)] == [True] * 5 + [False]
+    clock.now = 59.999
+    assert not limiter.hit(1)
+
+def test_previous_window_counts_fully_at_window_edge():
+    limiter, clock = make_limiter()
+    for _ in range(5):
+        limiter.hit(1)
+    # The sliding window still covers all of the previous window's hits
+    clock.now = 60.0
+    assert not limiter.hit(1)
+
+def test_previous_window_weight_decays():
+    limiter, clock = make_limiter()
+    for _ in range(5):
+        limiter.hit(1)
+    # Halfway through the next window, 5 * 0.5 = 2.5 hits still count
+    clock.now = 90.0
+    assert [limiter.hit(1) for _ in range(4)] == [True, True, True, False]
+
+def test_window_before_previous_is_forgotten():
+    limiter, clock = make_limiter()
+    for _ in range(5):
+        limiter.hit(1)
+    clock.now = 120.0
+    assert [limiter.hit(1) for _ in range(6)] == [True] * 5 + [False]
+
+def test_keys_are_limited_independently():
+    limiter, _ = make_limiter(limit=1)
+    assert limiter.hit(1)
+    assert not limiter.hit(1)
+    assert limiter.hit(2)
+
+def test_should_warn_once_per_window():
+    limiter, clock = make_limiter(limit=1)
+    limiter.hit(1)
+    assert not limiter.hit(1)
+    assert limiter.should_warn(1)
+    assert not limiter.should_warn(1)
+    # Previous window still blocks at its edge, but the warning resets
+    clock.now = 60.0
+    assert not limiter.hit(1)
+    assert limiter.should_warn(1)
+    assert not limiter.should_warn(1)
+
+def test_should_warn_unknown_key():
+    limiter, _ = make_limiter()
+    assert not limiter.should_warn(1)
+
+def test_idle_keys_evicted_after_100k_users():
+    limiter, clock = make_limiter()
+    for user_id in range(100_000):
+        limiter.hit(user_id)
+    assert len(limiter) == 100_000
+
+    # Still in the previous window: counts are needed for the sliding estimate
+    clock.now = 60.0
+    limiter.hit(0)
+    assert len(limiter) == 100_000
+
+    # A full window idle: everyone but the fresh key is evicted
+    clock.now = 120.0
+    limiter.hit(-1)
+    assert len(limiter) == 2
+    clock.now = 180.0
+    limiter.hit(-1)
+    assert len(limiter) == 1
+
+def test_recently_active_keys_survive_eviction():
+    limiter, clock = make_limiter()
+    for user_id in range(100):
+        limiter.hit(user_id)
+    clock.now = 60.0
+    limiter.hit(42)
+    clock.now = 120.0
+    limiter.hit(-1)
+    assert len(limiter) == 2
+    # 42's count from the previous window still applies
+    assert limiter.hit(42)
+
+def test_is_limited_does_not_record_hits():
+    limiter, clock = make_limiter(limit=2)
+    assert not limiter.is_limited(1)
+    limiter.hit(1)
+    assert not limiter.is_limited(1)
+    assert not limiter.is_limited(1)
+    limiter.hit(1)
+    assert limiter.is_limited(1)
+    # Rolls forward like hit(): halfway into the next window one hit still counts
+    clock.now = 90.0
+    assert not limiter.is_limited(1)
+    assert limiter.hit(1)
+    assert limiter.is_limited(1)
+
+def test_should_warn_resets_without_a_new_hit():
+    limiter, clock = make_limiter(limit=1)
+    limiter.hit(1)
+    assert limiter.should_warn(1)
+    clock.now = 60.0
+    assert limiter.should_warn(1)